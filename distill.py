@@ -0,0 +1,318 @@
+"""Distil the EfficientNetV2S + MobileNetV3Large + DeiT-Small ensemble into a
+single small PyTorch student that runs on CPU.
+
+    python distill.py --images data/unlabelled
+
+Steps:
+  1. run the three teachers over an unlabelled image folder and cache their
+     soft predictions (models/wayang_soft_labels.npz), reused on later runs
+  2. train the student on the averaged ensemble predictions (KL divergence)
+  3. write a report comparing latency, model size and top-1 agreement of the
+     student against each teacher and against the ensemble
+"""
+import argparse
+import functools
+import hashlib
+import os
+import random
+import time
+
+import numpy as np
+from PIL import Image
+
+import torch, timm
+import torch.nn.functional as F
+import torchvision.transforms as T
+
+device = "cpu"
+classes = ["Abimanyu", "Antasena", "Arjuna", "Bagong", "Bima", "Cepot", "Gareng",
+    "Gatot Kaca", "Hanoman", "Kresna", "Nakula", "Petruk", "Semar", "Yudhistira"
+]
+
+TEACHERS = ["eff", "mob", "deit"]
+TEACHER_PATHS = {
+    "eff": "models/wayang_efficientnetv2s.keras",
+    "mob": "models/wayang_mobilenetv3large.keras",
+    "deit": "models/wayang_deit_small.pth",
+}
+STUDENT_ARCH = "mobilenetv3_small_100"
+STUDENT_NAME = f"Student {STUDENT_ARCH} (PyTorch)"  # label in the app and report
+STUDENT_PATH = "models/wayang_student_mnv3s.pth"
+VAL_SPLIT_PATH = "models/wayang_student_val.txt"
+SOFT_LABELS_PATH = "models/wayang_soft_labels.npz"
+REPORT_PATH = "models/wayang_student_report.md"
+IMG_EXTS = (".jpg", ".jpeg", ".png")
+
+# ------- preprocessing (also used by wayang.py) --------
+def preprocess_tf(img, size=224):
+    img = img.resize((size, size))
+    arr = np.array(img).astype("float32") / 255.0
+    return arr[np.newaxis, ...]
+
+pt_tf = T.Compose([
+    T.Resize(224), T.CenterCrop(224),
+    T.ToTensor(),  T.Normalize([0.5]*3,[0.5]*3)
+])
+
+train_tf = T.Compose([
+    T.RandomResizedCrop(224, scale=(0.7, 1.0)), T.RandomHorizontalFlip(),
+    T.ToTensor(),  T.Normalize([0.5]*3,[0.5]*3)
+])
+
+def list_images(folder):
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.lower().endswith(IMG_EXTS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+def load_image(path):
+    return Image.open(path).convert("RGB")
+
+def save_val_split(paths, root, split_path=VAL_SPLIT_PATH):
+    """Record the held-out images (relative to `root`) the student was not trained on."""
+    with open(split_path, "w") as f:
+        f.writelines(os.path.relpath(p, root) + "\n" for p in paths)
+
+def load_val_split(root, split_path=VAL_SPLIT_PATH):
+    if not os.path.exists(split_path):
+        raise SystemExit(f"{split_path} not found; train the student first")
+    with open(split_path) as f:
+        paths = [os.path.join(root, line.rstrip("\n")) for line in f if line.strip()]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise SystemExit(f"{len(missing)} held-out images from {split_path} are missing "
+                         f"in {root}, e.g. {missing[0]}")
+    return paths
+
+# ------- models --------
+@functools.lru_cache(maxsize=None)
+def load_teachers():
+    """Load the three teachers once; later calls reuse the same models."""
+    import tensorflow as tf
+    eff_model = tf.keras.models.load_model(TEACHER_PATHS["eff"])
+    mob_model = tf.keras.models.load_model(TEACHER_PATHS["mob"])
+    deit = timm.create_model("deit_small_patch16_224", pretrained=False,
+                             num_classes=len(classes))
+    deit.load_state_dict(torch.load(TEACHER_PATHS["deit"], map_location=device))
+    deit.eval()
+    return {"eff": eff_model, "mob": mob_model, "deit": deit}
+
+def create_student(pretrained=False):
+    return timm.create_model(STUDENT_ARCH, pretrained=pretrained,
+                             num_classes=len(classes))
+
+def load_student(path=STUDENT_PATH):
+    student = create_student()
+    student.load_state_dict(torch.load(path, map_location=device))
+    student.eval()
+    return student
+
+def teacher_probs(name, model, img):
+    """Softmax output of one teacher for one image, as a numpy vector."""
+    if name == "deit":
+        with torch.no_grad():
+            return model(pt_tf(img).unsqueeze(0)).softmax(1)[0].numpy()
+    return model.predict(preprocess_tf(img), verbose=0)[0]
+
+def student_probs(student, img):
+    with torch.no_grad():
+        return student(pt_tf(img).unsqueeze(0)).softmax(1)[0].numpy()
+
+# ------- soft-label cache --------
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def teacher_signature():
+    """Content hash of each teacher weight file, to detect retrained teachers.
+
+    Hashing the contents (not mtime) keeps the cache valid when the weights
+    are copied or checked out again unchanged.
+    """
+    return tuple(f"{t}:{file_sha256(TEACHER_PATHS[t])}" for t in TEACHERS)
+
+def build_soft_labels(paths, root, cache_path=SOFT_LABELS_PATH):
+    """Return {"eff", "mob", "deit", "ensemble"} probability arrays for `paths`.
+
+    Teacher outputs are cached in `cache_path` keyed by the image path relative
+    to `root`; only images missing from the cache are run through the teachers.
+    The whole cache is dropped when any teacher weight file has changed.
+    """
+    signature = teacher_signature()
+    cached = {}
+    if os.path.exists(cache_path):
+        with np.load(cache_path, allow_pickle=False) as data:
+            if "teachers" in data and tuple(data["teachers"].tolist()) == signature:
+                arrs = {t: data[t] for t in TEACHERS}
+                keys = data["paths"].tolist()
+            else:
+                print(f"teacher weights changed, discarding {cache_path}")
+                arrs, keys = {}, []
+        for i, k in enumerate(keys):
+            cached[k] = {t: arrs[t][i] for t in TEACHERS}
+
+    keys = [os.path.relpath(p, root) for p in paths]
+    missing = [(k, p) for k, p in zip(keys, paths) if k not in cached]
+    if missing:
+        teachers = load_teachers()
+        for n, (k, p) in enumerate(missing, 1):
+            img = load_image(p)
+            cached[k] = {t: teacher_probs(t, teachers[t], img) for t in TEACHERS}
+            if n % 50 == 0 or n == len(missing):
+                print(f"soft labels: {n}/{len(missing)}")
+        all_keys = sorted(cached)
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        np.savez_compressed(
+            cache_path, paths=np.array(all_keys), teachers=np.array(signature),
+            **{t: np.stack([cached[k][t] for k in all_keys]).astype("float32")
+               for t in TEACHERS})
+
+    labels = {t: np.stack([cached[k][t] for k in keys]) for t in TEACHERS}
+    labels["ensemble"] = np.mean([labels[t] for t in TEACHERS], axis=0)
+    return labels
+
+# ------- training --------
+class SoftLabelDataset(torch.utils.data.Dataset):
+    def __init__(self, paths, targets, transform):
+        self.paths, self.targets, self.transform = paths, targets, transform
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        return self.transform(load_image(self.paths[i])), torch.from_numpy(self.targets[i])
+
+def train_student(paths, targets, epochs=15, batch_size=32, lr=1e-3, pretrained=True,
+                  workers=0):
+    student = create_student(pretrained=pretrained)
+    loader = torch.utils.data.DataLoader(
+        SoftLabelDataset(paths, targets.astype("float32"), train_tf),
+        batch_size=batch_size, shuffle=True, num_workers=workers,
+        persistent_workers=workers > 0)
+    opt = torch.optim.AdamW(student.parameters(), lr=lr, weight_decay=1e-4)
+    sched = torch.optim.lr_scheduler.CosineAnnealingLR(opt, epochs * len(loader))
+
+    for epoch in range(epochs):
+        student.train()
+        total = 0.0
+        for x, y in loader:
+            loss = F.kl_div(student(x).log_softmax(1), y, reduction="batchmean")
+            opt.zero_grad()
+            loss.backward()
+            opt.step()
+            sched.step()
+            total += loss.item() * len(x)
+        print(f"epoch {epoch + 1}/{epochs}  kl={total / len(paths):.4f}")
+
+    student.eval()
+    return student
+
+# ------- report --------
+def file_size_mb(path):
+    return os.path.getsize(path) / 2**20
+
+def time_per_image(fn, imgs, warmup=3):
+    for img in imgs[:warmup]:
+        fn(img)
+    start = time.perf_counter()
+    for img in imgs:
+        fn(img)
+    return (time.perf_counter() - start) / len(imgs) * 1000
+
+def write_report(paths, labels, student, n_latency=50, report_path=REPORT_PATH):
+    """Compare the student with each teacher and the ensemble on `paths`
+    (held-out images) and write a markdown table to `report_path`."""
+    teachers = load_teachers()
+    student_pred = np.stack([student_probs(student, load_image(p)) for p in paths]).argmax(1)
+
+    imgs = [load_image(p) for p in paths[:n_latency]]
+    latency = {t: time_per_image(lambda img, t=t: teacher_probs(t, teachers[t], img), imgs)
+               for t in TEACHERS}
+    latency["ensemble"] = sum(latency[t] for t in TEACHERS)
+    latency["student"] = time_per_image(lambda img: student_probs(student, img), imgs)
+
+    size = {t: file_size_mb(TEACHER_PATHS[t]) for t in TEACHERS}
+    size["ensemble"] = sum(size[t] for t in TEACHERS)
+    size["student"] = file_size_mb(STUDENT_PATH)
+
+    names = {"eff": "EfficientNetV2S (Keras)", "mob": "MobileNetV3Large (Keras)",
+             "deit": "DeiT-Small (PyTorch)", "ensemble": "Ensemble (3 model)",
+             "student": STUDENT_NAME}
+    lines = [
+        "# Student distillation report",
+        "",
+        f"Held-out images: {len(paths)}, latency measured on {len(imgs)} images "
+        f"(batch size 1, CPU, {torch.get_num_threads()} threads).",
+        "",
+        "| Model | Latency (ms/img) | Size (MB) | Top-1 agreement with student |",
+        "|---|---:|---:|---:|",
+    ]
+    for key in TEACHERS + ["ensemble"]:
+        agree = (labels[key].argmax(1) == student_pred).mean() * 100
+        lines.append(f"| {names[key]} | {latency[key]:.1f} | {size[key]:.1f} | {agree:.2f}% |")
+    lines.append(f"| {names['student']} | {latency['student']:.1f} | "
+                 f"{size['student']:.1f} | - |")
+
+    report = "\n".join(lines) + "\n"
+    with open(report_path, "w") as f:
+        f.write(report)
+    print(report)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--images", required=True, help="folder of unlabelled wayang images")
+    parser.add_argument("--cache", default=SOFT_LABELS_PATH, help="soft-label cache (.npz)")
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="DataLoader worker processes for image decoding")
+    parser.add_argument("--val-frac", type=float, default=0.2,
+                        help="fraction of images held out for the report")
+    parser.add_argument("--no-pretrained", action="store_true",
+                        help="do not start the student from ImageNet weights")
+    parser.add_argument("--report-only", action="store_true",
+                        help="skip training and report on the saved student and held-out split")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    torch.manual_seed(args.seed)
+
+    if args.report_only:
+        # reuse the split saved at training time so the report never scores
+        # the student on images it was trained on
+        val_paths = load_val_split(args.images)
+        val_labels = build_soft_labels(val_paths, args.images, args.cache)
+        student = load_student()
+    else:
+        paths = list_images(args.images)
+        if not paths:
+            raise SystemExit(f"no images found in {args.images}")
+        random.shuffle(paths)
+        n_val = max(1, int(len(paths) * args.val_frac))
+        val_paths, train_paths = paths[:n_val], paths[n_val:]
+        if not train_paths:
+            raise SystemExit("not enough images to train after the hold-out split")
+
+        labels = build_soft_labels(paths, args.images, args.cache)
+        val_labels = {k: v[:n_val] for k, v in labels.items()}
+        student = train_student(train_paths, labels["ensemble"][n_val:], epochs=args.epochs,
+                                batch_size=args.batch_size, lr=args.lr,
+                                pretrained=not args.no_pretrained,
+                                workers=args.workers)
+        torch.save(student.state_dict(), STUDENT_PATH)
+        save_val_split(val_paths, args.images)
+        print(f"saved {STUDENT_PATH} and {VAL_SPLIT_PATH}")
+
+    write_report(val_paths, val_labels, student)
+
+if __name__ == "__main__":
+    main()
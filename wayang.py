@@ -12,32 +12,22 @@ mob_model = tf.keras.models.load_model("models/wayang_mobilenetv3large.keras")
 
 # ------- load PyTorch model ----------
 import torch, timm
+# classes and preprocessing are shared with distill.py so the student is
+# served exactly as it was trained
+from distill import classes, preprocess_tf, pt_tf, STUDENT_NAME, STUDENT_PATH, load_student
 device = "cpu"
-classes = ["Abimanyu", "Antasena", "Arjuna", "Bagong", "Bima", "Cepot", "Gareng",
-    "Gatot Kaca", "Hanoman", "Kresna", "Nakula", "Petruk", "Semar", "Yudhistira"
-]
 
 deit = timm.create_model("deit_small_patch16_224", pretrained=False,
                          num_classes=len(classes))
 deit.load_state_dict(torch.load("models/wayang_deit_small.pth", map_location=device))
 deit.eval()
 
-# ------- helper for TF models --------
-def preprocess_tf(img, size=224):
-    img = img.resize((size, size))
-    arr = np.array(img).astype("float32") / 255.0
-    return arr[np.newaxis, ...]
+# ------- distilled student (built by distill.py) ----------
+student = load_student() if os.path.exists(STUDENT_PATH) else None
 
-# ------- helper for PyTorch ----------
-import torchvision.transforms as T
-pt_tf = T.Compose([
-    T.Resize(224), T.CenterCrop(224),
-    T.ToTensor(),  T.Normalize([0.5]*3,[0.5]*3)
-])
-
-def predict_pytorch(img):
+def predict_pytorch(img, model=deit):
     with torch.no_grad():
-        out = deit(pt_tf(img).unsqueeze(0)).softmax(1)[0]
+        out = model(pt_tf(img).unsqueeze(0)).softmax(1)[0]
     idx = out.argmax().item()
     return classes[idx], float(out[idx])
 
@@ -422,6 +412,8 @@ def predict(model_name, img):
         return classes[idx], float(pred[idx])
     elif model_name == "DeiT-Small (PyTorch)":
         return predict_pytorch(img)
+    elif model_name == STUDENT_NAME:
+        return predict_pytorch(img, student)
 
 # Tampilkan konten utama
 with main_container:
@@ -521,14 +513,19 @@ with main_container:
                 '<span class="model-badge"><i class="fas fa-bolt"></i> EfficientNetV2S</span>'
                 '<span class="model-badge"><i class="fas fa-mobile-alt"></i> MobileNetV3Large</span>'
                 '<span class="model-badge"><i class="fas fa-project-diagram"></i> DeiT-Small</span>'
+                + ('<span class="model-badge"><i class="fas fa-feather-alt"></i> Student (distilasi)</span>'
+                   if student is not None else '') +
                 '</div>', unsafe_allow_html=True)
     
     # Model selection in a centered container with 2 columns
+    model_options = ["EfficientNetV2S (Keras)", "MobileNetV3Large (Keras)", "DeiT-Small (PyTorch)"]
+    if student is not None:
+        model_options.append(STUDENT_NAME)
     col1, col2 = st.columns([1, 2])
     with col2:
         model_choice = st.multiselect(
             "Pilih Model Klasifikasi:",
-            ["EfficientNetV2S (Keras)", "MobileNetV3Large (Keras)", "DeiT-Small (PyTorch)"],
+            model_options,
             default=["EfficientNetV2S (Keras)"]
         )
     
@@ -569,6 +566,8 @@ with main_container:
                         # Get model icon
                         if "EfficientNet" in model_name:
                             icon = "fas fa-bolt"
+                        elif model_name == STUDENT_NAME:
+                            icon = "fas fa-feather-alt"
                         elif "MobileNet" in model_name:
                             icon = "fas fa-mobile-alt"
                         else: